@@ -7,73 +7,269 @@ Displays printer status, alerts, and historical data.
 import streamlit as st
 import sqlite3
 import json
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 import time
+from pathlib import Path
+import numpy as np
+# pandas and plotly are imported inside the functions that use them so
+# the first paint isn't held up by importing them
 
-class PrinterDashboard:
-    def __init__(self):
-        self.db_path = 'printer_data.db'
-        self.status_file = 'status.json'
-        self.alerts_log = 'alerts.log'
-        
-    def load_current_status(self):
-        try:
-            if os.path.exists(self.status_file):
-                with open(self.status_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            st.error(f"Error loading status: {e}")
-        return None
-        
-    def load_historical_data(self, minutes=10):
-        try:
-            if not os.path.exists(self.db_path):
-                return pd.DataFrame()
-                
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get data from last N minutes
-            cutoff_time = (datetime.now() - timedelta(minutes=minutes)).isoformat()
-            
-            query = '''
-                SELECT timestamp, nozzle_temp, bed_temp, printer_status
-                FROM sensor_data 
-                WHERE timestamp > ?
-                ORDER BY timestamp DESC
-                LIMIT 200
-            '''
-            
-            df = pd.read_sql_query(query, conn, params=(cutoff_time,))
-            conn.close()
-            
-            if not df.empty:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                
-            return df
+# Offset added to epoch seconds so the chart shows local wall-clock time
+LOCAL_UTC_OFFSET = int(datetime.now().astimezone().utcoffset().total_seconds())
+
+DB_PATH = 'printer_data.db'
+STATUS_FILE = 'status.json'
+ALERTS_LOG = 'alerts.log'
+
+# Loaders are cached for one refresh interval so every connected browser
+# tab shares a single read of the status file, database and alert log.
+CACHE_TTL = 5
+TAIL_BLOCK_SIZE = 128 * 1024  # bytes read per step when tailing the alert log
+
+# Printer status -> (metric value, delta) for the status panel
+STATUS_LABELS = {
+    'printing': ("Printing", "Active"),
+    'idle': ("Idle", "Standby"),
+    'error': ("Error", "⚠️ Issue"),
+}
+
+SYSTEM_STATUS_CAPTIONS = {
+    'normal': "🟢 System Status: Normal",
+    'warning': "🟡 System Status: Warning",
+    'error': "🔴 System Status: Error",
+}
+
+@st.cache_resource
+def get_conn():
+    # Read-only connection tuned for the 5-second read loop: pages are
+    # served from a memory map of the file with a 64 MiB page cache, and
+    # WAL mode on the writer side means these reads never block it
+    uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.executescript('''
+        PRAGMA mmap_size=268435456;
+        PRAGMA cache_size=-65536;
+        PRAGMA query_only=1;
+    ''')
+    return conn
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_current_status():
+    try:
+        if os.path.exists(STATUS_FILE):
+            with open(STATUS_FILE, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        st.error(f"Error loading status: {e}")
+    return None
+    
+@st.cache_data(ttl=CACHE_TTL)
+def load_historical_data(minutes=10, as_frame=False):
+    # Returns the chart history as a dict of NumPy arrays, or as a pandas
+    # DataFrame with the same columns when as_frame=True
+    try:
+        if not os.path.exists(DB_PATH):
+            return _history_result([], as_frame)
             
-        except Exception as e:
-            st.error(f"Error loading historical data: {e}")
-            return pd.DataFrame()
+        conn = get_conn()
+        
+        # Get data from last N minutes
+        cutoff_time = int(time.time()) - minutes * 60
+        
+        query = '''
+            SELECT ts, nozzle, bed, status
+            FROM recent_sensor_data
+            WHERE ts > ?
+            ORDER BY ts DESC
+            LIMIT 200
+        '''
+        
+        rows = conn.execute(query, (cutoff_time,)).fetchall()
+        return _history_result(rows, as_frame)
+        
+    except Exception as e:
+        st.error(f"Error loading historical data: {e}")
+        return _history_result([], as_frame)
+        
+def _history_result(rows, as_frame):
+    count = len(rows)
+    # Epoch seconds -> local wall-clock time for display
+    seconds = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    history = {
+        'timestamp': (seconds + LOCAL_UTC_OFFSET).astype('datetime64[s]'),
+        'nozzle_temp': np.fromiter((row[1] for row in rows), dtype=np.float32, count=count),
+        'bed_temp': np.fromiter((row[2] for row in rows), dtype=np.float32, count=count),
+        'printer_status': [row[3] for row in rows],
+    }
+    
+    if as_frame:
+        import pandas as pd
+        return pd.DataFrame(history)
+    return history
+    
+@st.cache_data(ttl=CACHE_TTL)
+def load_recent_alerts(count=10):
+    try:
+        if not os.path.exists(ALERTS_LOG):
+            return []
             
-    def load_recent_alerts(self, count=10):
-        try:
-            if not os.path.exists(self.alerts_log):
-                return []
+        # Read backwards from EOF in blocks until we have N lines, so the
+        # cost stays constant however large the log grows
+        with open(ALERTS_LOG, 'rb', buffering=TAIL_BLOCK_SIZE) as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0 and tail.count(b'\n') <= count:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                tail = f.read(step) + tail
                 
-            with open(self.alerts_log, 'r') as f:
-                lines = f.readlines()
+        lines = [line.strip() for line in tail.decode('utf-8', errors='replace').splitlines()]
+        lines = [line for line in lines if line]
+        
+        # Get last N lines
+        return lines[-count:]
+        
+    except Exception as e:
+        st.error(f"Error loading alerts: {e}")
+        return []
+
+@st.cache_data(ttl=CACHE_TTL)
+def build_temp_figure(history):
+    import plotly.graph_objects as go
+    
+    # Create temperature chart
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scattergl(
+        x=history['timestamp'],
+        y=history['nozzle_temp'],
+        mode='lines+markers',
+        name='Nozzle Temperature',
+        line=dict(color='red', width=2),
+        marker=dict(size=4)
+    ))
+    
+    fig.add_trace(go.Scattergl(
+        x=history['timestamp'],
+        y=history['bed_temp'],
+        mode='lines+markers',
+        name='Bed Temperature',
+        line=dict(color='blue', width=2),
+        marker=dict(size=4)
+    ))
+    
+    # Add temperature thresholds
+    fig.add_hline(y=225, line_dash="dash", line_color="orange", 
+                 annotation_text="Overheating Threshold")
+    
+    fig.update_layout(
+        title="Temperature Monitoring",
+        xaxis_title="Time",
+        yaxis_title="Temperature (°C)",
+        hovermode='x unified',
+        height=400
+    )
+    
+    return fig
+    
+@st.fragment(run_every=5)
+def status_panel():
+    # Load current status
+    status = load_current_status()
+    
+    if status is None:
+        st.warning("⚠️ No data available. Make sure the service is running.")
+        return
+        
+    current_data = status.get('current_data', {})
+    alerts = status.get('active_alerts', [])
+    
+    # Unpack the readings once
+    printer_status = current_data.get('printer_status', 'unknown')
+    nozzle_temp = current_data.get('nozzle_temp', 0.0)
+    bed_temp = current_data.get('bed_temp', 0.0)
+    progress = current_data.get('print_progress', 0.0)
+    
+    # Status Panel
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        label, delta = STATUS_LABELS.get(printer_status, (printer_status.title(), None))
+        st.metric("🖨️ Printer Status", label, delta=delta)
+        
+    with col2:
+        st.metric("🌡️ Nozzle Temp", f"{nozzle_temp:.1f}°C")
+        
+    with col3:
+        st.metric("🛏️ Bed Temp", f"{bed_temp:.1f}°C")
+        
+    with col4:
+        st.metric("📊 Progress", f"{progress:.1f}%")
+        
+    # Progress bar
+    if progress > 0:
+        st.progress(progress / 100.0)
+        
+    st.divider()
+    
+    # Alerts Panel
+    st.subheader("🚨 Alert Status")
+    
+    if not alerts:
+        st.info("✅ All systems normal - No active alerts")
+    else:
+        for alert in alerts:
+            if "Hard Failure" in alert:
+                st.error(f"🔴 {alert}")
+            elif "Predictive Alert" in alert:
+                st.warning(f"🟡 {alert}")
+            elif "Filament Jam" in alert:
+                st.error(f"🔴 {alert}")
+            else:
+                st.info(f"ℹ️ {alert}")
                 
-            # Get last N lines
-            recent_lines = lines[-count:] if len(lines) > count else lines
-            return [line.strip() for line in recent_lines if line.strip()]
+@st.fragment(run_every=5)
+def temperature_chart():
+    # Historical Data Charts
+    st.subheader("📈 Temperature Trends (Last 10 Minutes)")
+    
+    history = load_historical_data(minutes=10)
+    
+    if len(history['timestamp']) == 0:
+        st.info("No historical data available yet. Wait for the service to collect data.")
+        return
+        
+    st.plotly_chart(build_temp_figure(history), use_container_width=True)
+    
+@st.fragment(run_every=5)
+def alert_history():
+    # Recent Alerts Log
+    st.subheader("📋 Recent Alert History")
+    recent_alerts = load_recent_alerts(count=5)
+    
+    if not recent_alerts:
+        st.info("No recent alerts in log file.")
+    else:
+        for alert in reversed(recent_alerts):  # Show newest first
+            st.text(alert)
             
-        except Exception as e:
-            st.error(f"Error loading alerts: {e}")
-            return []
+    status = load_current_status()
+    if status is None:
+        return
+        
+    system_status = status.get('system_status', 'unknown')
+    
+    # System Info
+    st.divider()
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.caption(f"Last Updated: {status.get('last_updated', 'Unknown')}")
+        
+    with col2:
+        st.caption(SYSTEM_STATUS_CAPTIONS.get(system_status, f"❓ System Status: {system_status}"))
 
 def main():
     st.set_page_config(
@@ -82,149 +278,15 @@ def main():
         layout="wide"
     )
     
-    dashboard = PrinterDashboard()
-    
     # Header
     st.title("🖨️ 3D Printer Predictive Maintenance Dashboard")
     
-    # Auto-refresh
-    placeholder = st.empty()
-    
-    with placeholder.container():
-        # Load current status
-        status = dashboard.load_current_status()
-        
-        if status is None:
-            st.warning("⚠️ No data available. Make sure the service is running.")
-            st.stop()
-            
-        current_data = status.get('current_data', {})
-        alerts = status.get('active_alerts', [])
-        system_status = status.get('system_status', 'unknown')
-        
-        # Status Panel
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            printer_status = current_data.get('printer_status', 'unknown')
-            if printer_status == 'printing':
-                st.metric("🖨️ Printer Status", "Printing", delta="Active")
-            elif printer_status == 'idle':
-                st.metric("🖨️ Printer Status", "Idle", delta="Standby")
-            elif printer_status == 'error':
-                st.metric("🖨️ Printer Status", "Error", delta="⚠️ Issue")
-            else:
-                st.metric("🖨️ Printer Status", printer_status.title())
-                
-        with col2:
-            nozzle_temp = current_data.get('nozzle_temp', 0)
-            st.metric("🌡️ Nozzle Temp", f"{nozzle_temp:.1f}°C")
-            
-        with col3:
-            bed_temp = current_data.get('bed_temp', 0)
-            st.metric("🛏️ Bed Temp", f"{bed_temp:.1f}°C")
-            
-        with col4:
-            progress = current_data.get('print_progress', 0)
-            st.metric("📊 Progress", f"{progress:.1f}%")
-            
-        # Progress bar
-        if progress > 0:
-            st.progress(progress / 100.0)
-            
-        st.divider()
-        
-        # Alerts Panel
-        st.subheader("🚨 Alert Status")
-        
-        if not alerts:
-            st.info("✅ All systems normal - No active alerts")
-        else:
-            for alert in alerts:
-                if "Hard Failure" in alert:
-                    st.error(f"🔴 {alert}")
-                elif "Predictive Alert" in alert:
-                    st.warning(f"🟡 {alert}")
-                elif "Filament Jam" in alert:
-                    st.error(f"🔴 {alert}")
-                else:
-                    st.info(f"ℹ️ {alert}")
-                    
-        st.divider()
-        
-        # Historical Data Charts
-        st.subheader("📈 Temperature Trends (Last 10 Minutes)")
-        
-        df = dashboard.load_historical_data(minutes=10)
-        
-        if df.empty:
-            st.info("No historical data available yet. Wait for the service to collect data.")
-        else:
-            # Create temperature chart
-            fig = go.Figure()
-            
-            fig.add_trace(go.Scatter(
-                x=df['timestamp'],
-                y=df['nozzle_temp'],
-                mode='lines+markers',
-                name='Nozzle Temperature',
-                line=dict(color='red', width=2),
-                marker=dict(size=4)
-            ))
-            
-            fig.add_trace(go.Scatter(
-                x=df['timestamp'],
-                y=df['bed_temp'],
-                mode='lines+markers',
-                name='Bed Temperature',
-                line=dict(color='blue', width=2),
-                marker=dict(size=4)
-            ))
-            
-            # Add temperature thresholds
-            fig.add_hline(y=225, line_dash="dash", line_color="orange", 
-                         annotation_text="Overheating Threshold")
-            
-            fig.update_layout(
-                title="Temperature Monitoring",
-                xaxis_title="Time",
-                yaxis_title="Temperature (°C)",
-                hovermode='x unified',
-                height=400
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-        # Recent Alerts Log
-        st.subheader("📋 Recent Alert History")
-        recent_alerts = dashboard.load_recent_alerts(count=5)
-        
-        if not recent_alerts:
-            st.info("No recent alerts in log file.")
-        else:
-            for alert in reversed(recent_alerts):  # Show newest first
-                st.text(alert)
-                
-        # System Info
-        st.divider()
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.caption(f"Last Updated: {status.get('last_updated', 'Unknown')}")
-            
-        with col2:
-            if system_status == 'normal':
-                st.caption("🟢 System Status: Normal")
-            elif system_status == 'warning':
-                st.caption("🟡 System Status: Warning")
-            elif system_status == 'error':
-                st.caption("🔴 System Status: Error")
-            else:
-                st.caption(f"❓ System Status: {system_status}")
-    
-    # Auto-refresh every 5 seconds
-    time.sleep(5)
-    st.rerun()
+    # Each panel is a fragment that refreshes itself every 5 seconds,
+    # so only the panel contents are re-run instead of the whole page.
+    status_panel()
+    st.divider()
+    temperature_chart()
+    alert_history()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -3,80 +3,106 @@
 System Launcher - Starts all components in the correct order
 """
 
-import subprocess
-import time
+import asyncio
 import sys
-import os
 import signal
-import threading
 
 class SystemLauncher:
-    def __init__(self):
-        self.processes = []
+    def __init__(self, python=sys.executable):
+        self.python = python
+        self.processes = {}
+        self.tasks = []
+        self.stopping = False
+        self.max_backoff = 30  # seconds between restarts, at most
         
-    def start_component(self, script_name, component_name, delay=0):
-        if delay > 0:
-            print(f"Waiting {delay} seconds before starting {component_name}...")
-            time.sleep(delay)
+    async def supervise(self, args, component_name):
+        # Run the component, restarting it with exponential backoff
+        # whenever it exits abnormally
+        loop = asyncio.get_running_loop()
+        backoff = 1
+        
+        while not self.stopping:
+            print(f"Starting {component_name}...")
+            try:
+                process = await asyncio.create_subprocess_exec(self.python, *args)
+            except Exception as e:
+                print(f"Error starting {component_name}: {e}")
+                return
+                
+            self.processes[component_name] = process
+            started = loop.time()
+            returncode = await process.wait()
             
-        print(f"Starting {component_name}...")
-        try:
-            process = subprocess.Popen([sys.executable, script_name])
-            self.processes.append((process, component_name))
-            return process
-        except Exception as e:
-            print(f"Error starting {component_name}: {e}")
-            return None
+            if self.stopping or returncode == 0:
+                return
+                
+            # A component that stayed up for a while earns a fresh backoff
+            if loop.time() - started > self.max_backoff:
+                backoff = 1
+                
+            print(f"{component_name} exited with code {returncode}, restarting in {backoff}s...")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
             
-    def cleanup(self):
+    def start_component(self, args, component_name):
+        self.tasks.append(asyncio.create_task(self.supervise(args, component_name)))
+        
+    async def cleanup(self):
         print("\nShutting down all components...")
-        for process, name in self.processes:
-            try:
-                process.terminate()
-                print(f"Stopped {name}")
-            except:
-                pass
-                
-    def run(self):
+        self.stopping = True
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        
+        for name, process in self.processes.items():
+            if process.returncode is None:
+                try:
+                    process.terminate()
+                    await process.wait()
+                    print(f"Stopped {name}")
+                except ProcessLookupError:
+                    pass
+                    
+    async def start_components(self):
         print("🖨️ 3D Printer Predictive Maintenance System")
         print("=" * 50)
         
-        try:
-            # Start simulator first
-            self.start_component('simulator.py', 'Simulator (Flask API)')
-            
-            # Wait for simulator to start
-            time.sleep(3)
-            
-            # Start service
-            self.start_component('service.py', 'Predictive Maintenance Service')
-            
-            # Wait for service to collect some data
-            time.sleep(5)
-            
-            print("\n" + "=" * 50)
-            print("✅ All components started successfully!")
-            print("\nAccess points:")
-            print("- Simulator API: http://localhost:5000/api/v1/printer/status")
-            print("- Dashboard: Run 'streamlit run dashboard.py' in another terminal")
-            print("\nPress Ctrl+C to stop all components")
-            print("=" * 50)
+        # Start simulator first
+        self.start_component(['simulator.py'], 'Simulator (Flask API)')
+        
+        # Wait for simulator to start
+        await asyncio.sleep(3)
+        
+        # Start service
+        self.start_component(['service.py'], 'Predictive Maintenance Service')
+        
+        # Wait for service to collect some data
+        await asyncio.sleep(5)
+        
+        print("\n" + "=" * 50)
+        print("✅ All components started successfully!")
+        print("\nAccess points:")
+        print("- Simulator API: http://localhost:5000/api/v1/printer/status")
+        print("- Dashboard: Run 'streamlit run dashboard.py' in another terminal")
+        print("\nPress Ctrl+C to stop all components")
+        print("=" * 50)
+        
+    async def run(self):
+        # One event loop supervises every child; Ctrl+C / SIGTERM just
+        # wake it up to shut them down
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
             
-            # Keep running until interrupted
-            while True:
-                time.sleep(1)
-                
-        except KeyboardInterrupt:
-            self.cleanup()
-            print("System shutdown complete.")
-
+        startup = asyncio.create_task(self.start_components())
+        
+        # Keep running until interrupted
+        await stop.wait()
+        startup.cancel()
+        await self.cleanup()
+        print("System shutdown complete.")
+        
 if __name__ == '__main__':
     launcher = SystemLauncher()
-    
-    # Handle Ctrl+C gracefully
-    def signal_handler(sig, frame):
-        launcher.cleanup()
-        sys.exit(0)
-        
-    signal.signal(signal.SIGINT, signal_handler)
-    launcher.run()
\ No newline at end of file
+    asyncio.run(launcher.run())
\ No newline at end of file
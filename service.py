@@ -6,45 +6,115 @@ Polls the simulator, stores data, and performs anomaly detection.
 
 import sqlite3
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
+import os
 import time
 import logging
+import math
+import signal
+import sys
 from datetime import datetime
-from sklearn.ensemble import IsolationForest
-import numpy as np
-from collections import deque
+
+SENSOR_DATA_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sensor_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER NOT NULL,  -- Unix epoch milliseconds
+        nozzle_temp REAL,
+        bed_temp REAL,
+        printer_status TEXT,
+        filament_status TEXT,
+        print_progress REAL
+    )
+'''
 
 class PredictiveMaintenanceService:
     def __init__(self):
         self.db_path = 'printer_data.db'
         self.status_file = 'status.json'
         self.alerts_log = 'alerts.log'
-        self.simulator_url = 'http://localhost:5000/api/v1/printer/status'
+        self.simulator_url = 'http://localhost:5000/api/v1/printer/stream'
+        self.reconnect_delay = 5  # seconds to wait before reconnecting
+        
+        # Single pooled keep-alive connection to the simulator, reused
+        # across reconnects instead of a fresh socket per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount('http://', adapter)
+        self.session.headers['Connection'] = 'keep-alive'
+        
+        # Database state: one long-lived connection, with sensor_data rows
+        # buffered and written in batches
+        self.conn = None
+        self.recent_window = 600  # seconds kept in recent_sensor_data
+        self.flush_rows = 10  # flush after this many buffered rows...
+        self.flush_interval = 30  # ...or this many seconds, whichever first
+        self._pending = []
+        self._last_flush = time.time()
         
         # Temperature buffer for anomaly detection
-        self.temp_buffer = deque(maxlen=50)  # Last 50 readings
-        self.isolation_forest = IsolationForest(contamination=0.1, random_state=42)
-        self.model_trained = False
+        # Exponentially weighted mean/variance of nozzle temperature,
+        # updated in O(1) per reading and tracking slow drift
+        self.ewma_mean = 0.0
+        self.ewma_var = 0.0
+        self.alpha = 0.05
+        self.readings_seen = 0
+        self.sigma_threshold = 3.0
         
         self.setup_database()
         self.setup_logging()
         
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.conn = sqlite3.connect(self.db_path)
+        # WAL lets the dashboard read while we write; with synchronous=NORMAL
+        # commits no longer fsync, only checkpoints do
+        self.conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+        ''')
+        cursor = self.conn.cursor()
+        self.migrate_timestamps(cursor)
+        cursor.execute(SENSOR_DATA_SCHEMA)
+        # Newest-first index: "ORDER BY timestamp DESC LIMIT n" walks it and
+        # stops after n rows instead of sorting the whole history. It serves
+        # ascending range scans too, so it replaces the old idx_sensor_ts.
+        cursor.execute('DROP INDEX IF EXISTS idx_sensor_ts')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sensor_ts_desc ON sensor_data(timestamp DESC)')
+        # Rolling roll-up of the last few minutes, keyed on epoch seconds,
+        # so the dashboard never has to scan the full sensor_data history
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sensor_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                nozzle_temp REAL,
-                bed_temp REAL,
-                printer_status TEXT,
-                filament_status TEXT,
-                print_progress REAL
+            CREATE TABLE IF NOT EXISTS recent_sensor_data (
+                ts INTEGER PRIMARY KEY,
+                nozzle REAL,
+                bed REAL,
+                status TEXT
             )
         ''')
-        conn.commit()
-        conn.close()
+        self.conn.commit()
+        
+    def migrate_timestamps(self, cursor):
+        # Older databases stored timestamps as local-time ISO-8601 TEXT;
+        # rebuild the table with INTEGER Unix milliseconds instead
+        columns = {row[1]: row[2] for row in cursor.execute('PRAGMA table_info(sensor_data)')}
+        if columns.get('timestamp', '').upper() != 'TEXT':
+            return
+            
+        print("Migrating sensor_data timestamps to epoch milliseconds...")
+        cursor.executescript(f'''
+            BEGIN;
+            ALTER TABLE sensor_data RENAME TO sensor_data_old;
+            {SENSOR_DATA_SCHEMA};
+            INSERT INTO sensor_data
+                (id, timestamp, nozzle_temp, bed_temp, printer_status, filament_status, print_progress)
+            SELECT id,
+                   CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER),
+                   nozzle_temp, bed_temp, printer_status, filament_status, print_progress
+            FROM sensor_data_old
+            WHERE julianday(timestamp) IS NOT NULL;
+            DROP TABLE sensor_data_old;
+            COMMIT;
+        ''')
         
     def setup_logging(self):
         logging.basicConfig(
@@ -53,32 +123,65 @@ class PredictiveMaintenanceService:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         
-    def poll_simulator(self):
+    def stream_simulator(self):
+        # Yield readings pushed over the simulator's Server-Sent Events stream
         try:
-            response = requests.get(self.simulator_url, timeout=5)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error polling simulator: {e}")
-            return None
+            # Read timeout well above the push interval so a dead
+            # connection is noticed without tripping on normal gaps
+            with self.session.get(self.simulator_url, stream=True, timeout=(5, 30)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith('data:'):
+                        yield orjson.loads(line[len('data:'):])
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error streaming from simulator: {e}")
             
     def store_data(self, data):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO sensor_data 
-            (timestamp, nozzle_temp, bed_temp, printer_status, filament_status, print_progress)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            data['timestamp'],
+        now_ms = int(time.time() * 1000)
+        self._pending.append((
+            now_ms,
             data['nozzle_temp'],
             data['bed_temp'],
             data['printer_status'],
             data['filament_status'],
             data['print_progress']
         ))
-        conn.commit()
-        conn.close()
+        
+        # Refresh the rolling window incrementally: upsert this sample and
+        # drop anything older than the retention period. This is what the
+        # dashboard reads, so it is committed on every sample.
+        now = now_ms // 1000
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO recent_sensor_data (ts, nozzle, bed, status)
+            VALUES (?, ?, ?, ?)
+        ''', (now, data['nozzle_temp'], data['bed_temp'], data['printer_status']))
+        cursor.execute('DELETE FROM recent_sensor_data WHERE ts < ?',
+                       (now - self.recent_window,))
+        
+        if (len(self._pending) >= self.flush_rows
+                or now - self._last_flush >= self.flush_interval):
+            self.flush_pending()
+        else:
+            self.conn.commit()
+            
+    def flush_pending(self):
+        if self._pending:
+            self.conn.executemany('''
+                INSERT INTO sensor_data 
+                (timestamp, nozzle_temp, bed_temp, printer_status, filament_status, print_progress)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', self._pending)
+            self._pending = []
+        self.conn.commit()
+        self._last_flush = time.time()
+        
+    def close(self):
+        if self.conn is not None:
+            self.flush_pending()
+            self.conn.close()
+            self.conn = None
+        self.session.close()
         
     def check_immediate_failures(self, data):
         alerts = []
@@ -101,34 +204,30 @@ class PredictiveMaintenanceService:
         nozzle_temp = data['nozzle_temp']
         timestamp = data['timestamp']
         
-        # Add to temperature buffer
-        self.temp_buffer.append(nozzle_temp)
+        # Seed the statistics with the first reading
+        if self.readings_seen == 0:
+            self.ewma_mean = nozzle_temp
+        self.readings_seen += 1
+        
+        # Upward deviation from the mean so far, before folding this reading
+        # in - cooling down (e.g. printing -> idle) is not overheating
+        delta = nozzle_temp - self.ewma_mean
+        deviation_exceeded = delta > self.sigma_threshold * math.sqrt(self.ewma_var)
+        self.ewma_mean += self.alpha * delta
+        self.ewma_var = (1 - self.alpha) * (self.ewma_var + self.alpha * delta * delta)
         
         # Need at least 20 readings to start anomaly detection
-        if len(self.temp_buffer) < 20:
+        if self.readings_seen < 20:
             return alerts
             
-        # Train model if not trained yet
-        if not self.model_trained and len(self.temp_buffer) >= 30:
-            # Use first 30 readings as "normal" baseline
-            baseline_temps = list(self.temp_buffer)[:30]
-            X = np.array(baseline_temps).reshape(-1, 1)
-            self.isolation_forest.fit(X)
-            self.model_trained = True
-            print("Anomaly detection model trained")
-            
-        # Perform anomaly detection
-        if self.model_trained:
-            prediction = self.isolation_forest.predict([[nozzle_temp]])
-            
-            # Also check for simple temperature threshold
-            temp_threshold_exceeded = nozzle_temp > 225.0  # Above normal printing temp
+        # Also check for simple temperature threshold
+        temp_threshold_exceeded = nozzle_temp > 225.0  # Above normal printing temp
+        
+        if deviation_exceeded or temp_threshold_exceeded:
+            alert = f"Predictive Alert: Potential Overheating Detected! Temp: {nozzle_temp:.1f}°C at {timestamp}"
+            alerts.append(alert)
+            logging.warning(f"PREDICTIVE_ALERT|{timestamp}|{nozzle_temp:.1f}|Overheating detected")
             
-            if prediction[0] == -1 or temp_threshold_exceeded:
-                alert = f"Predictive Alert: Potential Overheating Detected! Temp: {nozzle_temp:.1f}°C at {timestamp}"
-                alerts.append(alert)
-                logging.warning(f"PREDICTIVE_ALERT|{timestamp}|{nozzle_temp:.1f}|Overheating detected")
-                
         return alerts
         
     def update_status_file(self, data, alerts):
@@ -140,43 +239,51 @@ class PredictiveMaintenanceService:
                            "warning" if alerts else "normal"
         }
         
-        with open(self.status_file, 'w') as f:
-            json.dump(status, f, indent=2)
+        # Write to a temp file and swap it in so readers never see a
+        # partially written status file
+        tmp_file = self.status_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(status))
+        os.replace(tmp_file, self.status_file)
             
     def run(self):
         print("Starting Predictive Maintenance Service...")
-        print(f"Polling simulator every 5 seconds at {self.simulator_url}")
-        
-        while True:
-            try:
-                # Poll simulator
-                data = self.poll_simulator()
-                if data is None:
-                    time.sleep(5)
-                    continue
-                    
-                # Store data
-                self.store_data(data)
-                
-                # Check for alerts
-                immediate_alerts = self.check_immediate_failures(data)
-                predictive_alerts = self.check_predictive_anomalies(data)
-                all_alerts = immediate_alerts + predictive_alerts
-                
-                # Update status file
-                self.update_status_file(data, all_alerts)
-                
-                # Print alerts to console
-                for alert in all_alerts:
-                    print(f"ALERT: {alert}")
-                    
-                print(f"Status: {data['printer_status']}, Nozzle: {data['nozzle_temp']:.1f}°C, Bed: {data['bed_temp']:.1f}°C")
-                
-            except Exception as e:
-                print(f"Error in main loop: {e}")
+        print(f"Streaming simulator data from {self.simulator_url}")
+        
+        try:
+            while True:
+                for data in self.stream_simulator():
+                    try:
+                        # Store data
+                        self.store_data(data)
+                        
+                        # Check for alerts
+                        immediate_alerts = self.check_immediate_failures(data)
+                        predictive_alerts = self.check_predictive_anomalies(data)
+                        all_alerts = immediate_alerts + predictive_alerts
+                        
+                        # Update status file
+                        self.update_status_file(data, all_alerts)
+                        
+                        # Print alerts to console
+                        for alert in all_alerts:
+                            print(f"ALERT: {alert}")
+                            
+                        print(f"Status: {data['printer_status']}, Nozzle: {data['nozzle_temp']:.1f}°C, Bed: {data['bed_temp']:.1f}°C")
+                        
+                    except Exception as e:
+                        print(f"Error in main loop: {e}")
+                        
+                # Stream ended or failed to connect - retry shortly
+                time.sleep(self.reconnect_delay)
                 
-            time.sleep(5)
+        finally:
+            # Write out any buffered rows before exiting
+            self.close()
 
 if __name__ == '__main__':
+    # Turn SIGTERM into a normal exit so buffered rows are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     service = PredictiveMaintenanceService()
     service.run()
\ No newline at end of file
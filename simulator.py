@@ -4,10 +4,10 @@ Virtual 3D Printer Simulator - Flask API
 Simulates a 3D printer with various states including normal operation, errors, and anomalies.
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
+import orjson
 import time
-import random
-import math
+import numpy as np
 from datetime import datetime
 
 app = Flask(__name__)
@@ -16,70 +16,119 @@ class PrinterSimulator:
     def __init__(self):
         self.start_time = time.time()
         self.state_cycle_duration = 60  # seconds per state
-        self.states = ['idle', 'printing', 'anomaly', 'error', 'printing']
+        self.stream_interval = 5  # seconds between pushed readings
         
-    def get_current_state(self):
-        elapsed = time.time() - self.start_time
-        cycle_position = (elapsed % (len(self.states) * self.state_cycle_duration)) / self.state_cycle_duration
-        return self.states[int(cycle_position)]
-    
-    def get_printer_data(self):
-        state = self.get_current_state()
-        timestamp = datetime.now().isoformat()
+        # Data generator for each slot of the state cycle
+        # (idle -> printing -> anomaly -> error -> printing), dispatched by index
+        self._handlers = (self._idle_data, self._printing_data, self._anomaly_data,
+                          self._error_data, self._printing_data)
         
-        if state == 'idle':
-            return {
-                "printer_status": "idle",
-                "nozzle_temp": 25.0 + random.uniform(-2, 2),
-                "bed_temp": 25.0 + random.uniform(-1, 1),
-                "print_progress": 0.0,
-                "filament_status": "ok",
-                "timestamp": timestamp
-            }
+        # Uniform noise is drawn from numpy in batches and handed out one
+        # value at a time, instead of a random.uniform() call per reading
+        self._rng = np.random.default_rng()
+        self._noise = []
+        self._noise_index = 0
         
-        elif state == 'printing':
-            # Normal printing with slight temperature fluctuations
-            base_time = time.time() - self.start_time
-            progress = (base_time % 300) / 300 * 100  # 5-minute print cycle
-            
-            return {
-                "printer_status": "printing",
-                "nozzle_temp": 210.5 + random.uniform(-1.5, 1.5),
-                "bed_temp": 60.1 + random.uniform(-0.9, 0.9),
-                "print_progress": min(progress, 100.0),
-                "filament_status": "ok",
-                "timestamp": timestamp
-            }
+        self._payload_cache = (None, b'')
+        
+    def _uniform(self, low, high):
+        noise, i = self._noise, self._noise_index
+        if i >= len(noise):
+            noise = self._noise = self._rng.random(1024).tolist()
+            i = 0
+        self._noise_index = i + 1
+        return low + (high - low) * noise[i]
+        
+    def _state_index(self, elapsed):
+        cycle_position = (elapsed % (len(self._handlers) * self.state_cycle_duration)) / self.state_cycle_duration
+        return int(cycle_position)
         
-        elif state == 'anomaly':
-            # Overheating anomaly - temperature climbing beyond normal range
-            elapsed_in_state = (time.time() - self.start_time) % self.state_cycle_duration
-            temp_increase = elapsed_in_state * 0.5  # Gradual temperature increase
+    def get_printer_data(self, now=None):
+        # Read the clock once and derive the state, progress and
+        # timestamp from that single reading
+        if now is None:
+            now = time.time()
+        elapsed = now - self.start_time
+        timestamp = datetime.fromtimestamp(now).isoformat()
+        return self._handlers[self._state_index(elapsed)](elapsed, timestamp)
+        
+    def get_printer_payload(self):
+        # Serialised reading, memoised per wall-clock second so bursts of
+        # requests (and every stream subscriber) share one encode
+        now = time.time()
+        second = int(now)
+        cached_second, payload = self._payload_cache
+        if cached_second == second:
+            return payload
             
-            return {
-                "printer_status": "printing",  # Still printing, but anomalous
-                "nozzle_temp": 210.5 + temp_increase + random.uniform(-2, 5),
-                "bed_temp": 60.1 + random.uniform(-0.9, 0.9),
-                "print_progress": 45.2,
-                "filament_status": "ok",
-                "timestamp": timestamp
-            }
+        payload = orjson.dumps(self.get_printer_data(now))
+        self._payload_cache = (second, payload)
+        return payload
+        
+    def _idle_data(self, elapsed, timestamp):
+        return {
+            "printer_status": "idle",
+            "nozzle_temp": 25.0 + self._uniform(-2, 2),
+            "bed_temp": 25.0 + self._uniform(-1, 1),
+            "print_progress": 0.0,
+            "filament_status": "ok",
+            "timestamp": timestamp
+        }
+        
+    def _printing_data(self, elapsed, timestamp):
+        # Normal printing with slight temperature fluctuations
+        progress = (elapsed % 300) / 300 * 100  # 5-minute print cycle
         
-        elif state == 'error':
-            return {
-                "printer_status": "error",
-                "nozzle_temp": 210.5 + random.uniform(-1.5, 1.5),
-                "bed_temp": 60.1 + random.uniform(-0.9, 0.9),
-                "print_progress": 45.2,
-                "filament_status": "jammed",
-                "timestamp": timestamp
-            }
+        return {
+            "printer_status": "printing",
+            "nozzle_temp": 210.5 + self._uniform(-1.5, 1.5),
+            "bed_temp": 60.1 + self._uniform(-0.9, 0.9),
+            "print_progress": min(progress, 100.0),
+            "filament_status": "ok",
+            "timestamp": timestamp
+        }
+        
+    def _anomaly_data(self, elapsed, timestamp):
+        # Overheating anomaly - temperature climbing beyond normal range
+        elapsed_in_state = elapsed % self.state_cycle_duration
+        temp_increase = elapsed_in_state * 0.5  # Gradual temperature increase
+        
+        return {
+            "printer_status": "printing",  # Still printing, but anomalous
+            "nozzle_temp": 210.5 + temp_increase + self._uniform(-2, 5),
+            "bed_temp": 60.1 + self._uniform(-0.9, 0.9),
+            "print_progress": 45.2,
+            "filament_status": "ok",
+            "timestamp": timestamp
+        }
+        
+    def _error_data(self, elapsed, timestamp):
+        return {
+            "printer_status": "error",
+            "nozzle_temp": 210.5 + self._uniform(-1.5, 1.5),
+            "bed_temp": 60.1 + self._uniform(-0.9, 0.9),
+            "print_progress": 45.2,
+            "filament_status": "jammed",
+            "timestamp": timestamp
+        }
 
 simulator = PrinterSimulator()
 
 @app.route('/api/v1/printer/status')
 def get_printer_status():
-    return jsonify(simulator.get_printer_data())
+    return Response(simulator.get_printer_payload(), mimetype='application/json')
+
+@app.route('/api/v1/printer/stream')
+def stream_printer_status():
+    # Server-Sent Events: push a reading every stream_interval seconds over
+    # one long-lived connection instead of answering repeated polls
+    def generate():
+        while True:
+            yield b"data: " + simulator.get_printer_payload() + b"\n\n"
+            time.sleep(simulator.stream_interval)
+            
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
 
 @app.route('/health')
 def health_check():
@@ -88,4 +137,9 @@ def health_check():
 if __name__ == '__main__':
     print("Starting 3D Printer Simulator...")
     print("API available at: http://localhost:5000/api/v1/printer/status")
-    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    print("Event stream at: http://localhost:5000/api/v1/printer/stream")
+    
+    # Production WSGI server: requests are handled on a thread pool, so
+    # long-lived event streams don't block status polls or health checks
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=5000, threads=8)
\ No newline at end of file